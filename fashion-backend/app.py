@@ -1,15 +1,213 @@
-from flask import Flask, jsonify
-from flask_cors import CORS
+from flask import Flask, Response, jsonify, request
 import pandas as pd
+import numpy as np # For vectorized popularity scaling and simulated predictions
 import os
-import random # For simulating predictions
+import hashlib # For keying the processed-data cache
+import pickle
+import glob
+import tempfile
+from collections import Counter # For folding category counts across chunks
+from dataclasses import asdict, dataclass
+
+try:
+    import pyarrow as pa # Optional: multithreaded CSV parsing (streamed for files over CHUNK_BYTES)
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+try:
+    import orjson # Optional: faster JSON encoding for API responses
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+    class OrjsonProvider(JSONProvider):
+        """
+        Flask JSON provider backed by orjson. Output is compact and keys are
+        sorted like Flask's default provider; types orjson can't encode (e.g.
+        Decimal) go through the default provider's `default` hook. Responses
+        are built from orjson's bytes directly.
+        """
+        mimetype = 'application/json'
+
+        def encode(self, obj, default=DefaultJSONProvider.default, sort_keys=True, **kwargs):
+            """
+            Encodes `obj` to bytes. Supports the `default` and `sort_keys` arguments
+            of json.dumps; anything else has no orjson equivalent and is rejected.
+            """
+            if kwargs:
+                raise TypeError(f"OrjsonProvider does not support: {', '.join(sorted(kwargs))}")
+            return orjson.dumps(obj, default=default, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+
+        def dumps(self, obj, **kwargs):
+            return self.encode(obj, **kwargs).decode('utf-8')
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+        def response(self, *args, **kwargs):
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(self.encode(obj), mimetype=self.mimetype)
 
 app = Flask(__name__)
-CORS(app)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
+@app.after_request
+def add_cors_headers(response):
+    """
+    Allows the React frontend (served from another origin) to call the API.
+    The headers are fixed, so they are set directly instead of via flask-cors.
+    """
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    if request.method == 'OPTIONS': # CORS preflight, answered by Flask's automatic OPTIONS handling
+        response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+        response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    return response
 
 # Path to your downloaded Kaggle dataset CSV file
 DATASET_FILE = 'Pintrest_Fashion data.csv' # Make sure this file is in the same directory as app.py
 
+# Candidate category columns, in priority order ('Type ' then 'Subtype' for the Kaggle dataset)
+CATEGORY_COLUMNS = ('Type ', 'Subtype', 'Category', 'category', 'ProductCategory', 'product_category')
+
+# Optional text columns used to build keywords, descriptions and images
+TEXT_COLUMNS = ['description', 'title', 'image_url']
+
+# Directory where processed trends are cached between restarts
+CACHE_DIR = '.cache'
+# Bump whenever a processing change alters the trends produced (not just their
+# format), so cache files written by older code are ignored
+CACHE_VERSION = 4
+
+# Rows (pandas) or bytes (pyarrow) read per chunk when streaming the dataset;
+# with pyarrow, files no larger than CHUNK_BYTES are parsed in one multithreaded pass
+CHUNK_ROWS = 200_000
+CHUNK_BYTES = 64 * 1024 * 1024
+
+# Run the development server with the debugger and reloader (python app.py)
+DEBUG = True
+
+@dataclass(slots=True)
+class Trend:
+    """
+    A single fashion trend as returned by /api/trends.
+    Field names match the JSON keys the frontend expects.
+    """
+    id: int
+    trendName: str
+    category: str
+    currentPopularity: int
+    predictedPopularityChange: str
+    keywords: list
+    imageUrl: str
+    description: str
+
+def iter_dataset_chunks(usecols, dtypes):
+    """
+    Streams the given columns of the dataset in chunks with the given pandas dtypes.
+    With pyarrow installed, a file of at most CHUNK_BYTES is parsed in one go by
+    pyarrow's multithreaded reader; larger files are streamed block by block,
+    which bounds memory but is single-threaded. Without pyarrow, pandas' C parser
+    reads CHUNK_ROWS rows at a time. Either way the file is memory-mapped so the
+    parser reads straight from the page cache.
+    """
+    if pa is None:
+        with pd.read_csv(DATASET_FILE, usecols=usecols, dtype=dtypes, engine='c',
+                         memory_map=True, chunksize=CHUNK_ROWS) as reader:
+            yield from reader
+        return
+
+    # Descriptions can contain line breaks inside quotes, which pyarrow only
+    # accepts with newlines_in_values (pandas' engine='pyarrow' can't set this)
+    parse_options = pa_csv.ParseOptions(newlines_in_values=True)
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=usecols,
+        column_types={col: pa.string() for col in usecols},
+        strings_can_be_null=True,
+    )
+    with pa.memory_map(DATASET_FILE, 'r') as source:
+        if os.stat(DATASET_FILE).st_size <= CHUNK_BYTES:
+            table = pa_csv.read_csv(source, parse_options=parse_options, convert_options=convert_options)
+            yield table.to_pandas().astype(dtypes)
+            return
+
+        reader = pa_csv.open_csv(
+            source,
+            read_options=pa_csv.ReadOptions(block_size=CHUNK_BYTES),
+            parse_options=parse_options,
+            convert_options=convert_options,
+        )
+        for batch in reader:
+            yield batch.to_pandas().astype(dtypes)
+
+# Range of simulated predicted popularity changes, and their display labels
+# (e.g. "+5", "-3"), formatted once so predictions only need an array lookup
+MIN_PREDICTED_CHANGE, MAX_PREDICTED_CHANGE = -10, 25
+PREDICTED_CHANGE_LABELS = np.array([f"+{n}" if n >= 0 else str(n)
+                                    for n in range(MIN_PREDICTED_CHANGE, MAX_PREDICTED_CHANGE + 1)])
+
+# Seeded generator so simulated predictions are reproducible across restarts
+PREDICTION_RNG = np.random.default_rng(0xF45A10)
+
+def simulate_popularity(counts):
+    """
+    Simulates current popularity and predicted change for every category at once.
+    Returns the popularity values and the predicted change labels.
+    """
+    # Simulate current popularity based on count (scaled)
+    # Max count will be 100% popularity, others relative
+    popularities = (counts / counts.max() * 100).astype(np.int64)
+    popularities = np.clip(popularities, 30, 95) # Keep within a reasonable range
+
+    # Simulate predicted popularity change
+    # Positive change for higher counts, negative for lower, or random
+    changes = PREDICTION_RNG.integers(MIN_PREDICTED_CHANGE, MAX_PREDICTED_CHANGE + 1, size=len(counts))
+    return popularities, PREDICTED_CHANGE_LABELS[changes - MIN_PREDICTED_CHANGE]
+
+def first_valid_per_category(values, codes, categories):
+    """
+    Returns the first non-null entry of `values` for each category, indexed by
+    `categories` (NA where a category has none). Works directly on the integer
+    category codes with NumPy instead of going through a pandas groupby.
+    """
+    positions = np.flatnonzero(values.notna().to_numpy() & (codes >= 0))
+    # np.unique's return_index gives the first occurrence of each code
+    first_codes, first_idx = np.unique(codes[positions], return_index=True)
+    first_values = values.iloc[positions[first_idx]].set_axis(categories[first_codes])
+    return first_values.reindex(categories)
+
+def aggregate_dataset(category_col, usecols, dtypes):
+    """
+    Streams the dataset once, folding each chunk into running per-category
+    counts and the first non-null value of each text column per category.
+    Returns the category counts (largest first), the first values and the row count.
+    """
+    counts = Counter()
+    text_cols = [col for col in usecols if col in TEXT_COLUMNS]
+    first_values = {col: pd.Series(dtype='string') for col in text_cols}
+    n_rows = 0
+
+    for chunk in iter_dataset_chunks(usecols, dtypes):
+        n_rows += len(chunk)
+        # Work on integer category codes instead of comparing/hashing strings
+        chunk_categories = chunk[category_col].astype('category')
+        categories = chunk_categories.cat.categories
+        codes = chunk_categories.cat.codes.to_numpy()
+        # Count items per category in C (code -1 marks a missing category)
+        code_counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+        counts.update({category: int(count) for category, count in zip(categories, code_counts) if count})
+        # Keep values found in earlier chunks, only fill in categories still missing one
+        for col in text_cols:
+            first_values[col] = first_values[col].combine_first(
+                first_valid_per_category(chunk[col], codes, categories))
+
+    category_counts = pd.Series(counts, dtype=np.int64).sort_index().sort_values(ascending=False, kind='stable')
+    first_values = {col: values.reindex(category_counts.index) for col, values in first_values.items()}
+    return category_counts, first_values, n_rows
+
 def load_and_process_data():
     """
     Loads the Pinterest fashion data from the Kaggle dataset,
@@ -32,107 +230,106 @@ def load_and_process_data():
         print("and place it in the same directory as app.py.")
         # Fallback to mock data if the file is not found
         return [
-            {
-                "id": 1, "trendName": "Fallback: Oversized Blazers", "category": "Outerwear",
-                "currentPopularity": 85, "predictedPopularityChange": "+10",
-                "keywords": ["blazer", "oversized", "formal", "casual", "chic"],
-                "imageUrl": "https://placehold.co/300x200/F0F0F0/333333?text=Fallback+Data",
-                "description": "Using fallback data. Please ensure Kaggle dataset is downloaded."
-            },
-            {
-                "id": 2, "trendName": "Fallback: Cargo Pants", "category": "Bottoms",
-                "currentPopularity": 78, "predictedPopularityChange": "+15",
-                "keywords": ["cargo", "pants", "utility", "streetwear", "comfort"],
-                "imageUrl": "https://placehold.co/300x200/F0F0F0/333333?text=Fallback+Data",
-                "description": "Using fallback data. Please ensure Kaggle dataset is downloaded."
-            }
+            Trend(
+                id=1, trendName="Fallback: Oversized Blazers", category="Outerwear",
+                currentPopularity=85, predictedPopularityChange="+10",
+                keywords=["blazer", "oversized", "formal", "casual", "chic"],
+                imageUrl="https://placehold.co/300x200/F0F0F0/333333?text=Fallback+Data",
+                description="Using fallback data. Please ensure Kaggle dataset is downloaded."
+            ),
+            Trend(
+                id=2, trendName="Fallback: Cargo Pants", category="Bottoms",
+                currentPopularity=78, predictedPopularityChange="+15",
+                keywords=["cargo", "pants", "utility", "streetwear", "comfort"],
+                imageUrl="https://placehold.co/300x200/F0F0F0/333333?text=Fallback+Data",
+                description="Using fallback data. Please ensure Kaggle dataset is downloaded."
+            )
         ]
 
     try:
-        # Load the dataset
-        df = pd.read_csv(DATASET_FILE)
-        print(f"Dataset '{DATASET_FILE}' loaded successfully. Shape: {df.shape}")
-        print(f"Columns: {df.columns.tolist()}")
+        # Read only the header first so we know which columns are available
+        header = pd.read_csv(DATASET_FILE, nrows=0).columns
 
         # --- Basic Trend Extraction Simulation ---
-        # Updated: Prioritize 'Type ' then 'Subtype' for category column
-        category_col = None
-        for col in ['Type ', 'Subtype', 'Category', 'category', 'ProductCategory', 'product_category']:
-            if col in df.columns:
-                category_col = col
-                break
-
-        if category_col and not df[category_col].empty: # Ensure the column exists and is not entirely empty
-            # Group by category and get some aggregated info
-            category_counts = df[category_col].value_counts()
-            unique_categories = category_counts.index.tolist()
-
-            for i, category in enumerate(unique_categories):
-                # Filter items for the current category
-                category_df = df[df[category_col] == category]
-
-                # Simulate current popularity based on count (scaled)
-                # Max count will be 100% popularity, others relative
-                max_count = category_counts.max()
-                current_popularity = int((category_counts[category] / max_count) * 100)
-                current_popularity = min(max(current_popularity, 30), 95) # Keep within a reasonable range
-
-                # Simulate predicted popularity change
-                # Positive change for higher counts, negative for lower, or random
-                predicted_change = random.randint(-10, 25) # Simulate a range of changes
-                predicted_change_str = f"+{predicted_change}" if predicted_change >= 0 else str(predicted_change)
-
-                # Extract keywords/description (simplified)
-                keywords = []
-                # Try to get keywords from 'description' or 'title'
-                if 'description' in category_df.columns and not category_df['description'].isnull().all():
-                    sample_desc = category_df['description'].dropna().iloc[0]
-                    keywords = list(set([word.lower() for word in sample_desc.split() if len(word) > 3]))[:5]
-                elif 'title' in category_df.columns and not category_df['title'].isnull().all():
-                    sample_title = category_df['title'].dropna().iloc[0]
-                    keywords = list(set([word.lower() for word in sample_title.split() if len(word) > 3]))[:5]
-                else:
-                    keywords = [category.lower().replace(' ', '-')] # Fallback to category name as keyword
+        category_col = next((col for col in CATEGORY_COLUMNS if col in header), None)
+
+        # Load only the columns we actually use, with explicit dtypes so pandas
+        # skips type inference (the category dtype also makes grouping cheaper)
+        usecols = [col for col in header if col == category_col or col in TEXT_COLUMNS]
+        dtypes = {col: 'string' for col in TEXT_COLUMNS}
+        if category_col:
+            dtypes[category_col] = 'category'
+            # Stream the file in chunks so memory is bounded by the chunk size, not the file size
+            category_counts, first_values, n_rows = aggregate_dataset(
+                category_col, usecols, {col: dtypes[col] for col in usecols})
+            print(f"Dataset '{DATASET_FILE}' loaded successfully. Shape: ({n_rows}, {len(usecols)})")
+            print(f"Columns: {usecols}")
+
+        if category_col and not category_counts.empty: # Ensure the column exists and is not entirely empty
+            categories = category_counts.index
+
+            # Check once per column (not per category) whether it holds any values at all
+            have_desc_col = 'description' in first_values and first_values['description'].notna().any()
+            have_title_col = 'title' in first_values and first_values['title'].notna().any()
+            have_image_col = 'image_url' in first_values and first_values['image_url'].notna().any()
+
+            # Extract keywords from each category's first description (or title),
+            # using pandas' vectorized string methods over all categories at once
+            text_cols = [col for col in ['description', 'title'] if col in first_values]
+            if text_cols:
+                sample_texts = pd.DataFrame({col: first_values[col] for col in text_cols}).bfill(axis=1).iloc[:, 0]
+                keyword_lists = (sample_texts.dropna().str.lower().str.findall(r'\w{4,}')
+                                 .apply(lambda words: list(dict.fromkeys(words))[:5])) # Dedupe, keep order
+            else:
+                keyword_lists = pd.Series(dtype=object)
+
+            # Use a sample image URL if available, otherwise a placeholder
+            image_urls = pd.Series('https://placehold.co/300x200/F0F0F0/333333?text=' + categories.str.replace(' ', '+'),
+                                   index=categories)
+            if have_image_col:
+                # Basic validation to ensure the first non-null image URL looks like a URL
+                first_image_urls = first_values['image_url']
+                image_urls = first_image_urls.where(first_image_urls.str.startswith('http', na=False), image_urls)
+
+            popularities, change_strs = simulate_popularity(category_counts.to_numpy())
+
+            for i, category in enumerate(category_counts.index):
+                # Look up the first non-null sample of each text column for this category
+                sample_desc = first_values['description'].loc[category] if have_desc_col else None
+                sample_title = first_values['title'].loc[category] if have_title_col else None
+
+                # Fallback to category name as keyword if no description/title words were found
+                keywords = keyword_lists.get(category) or [category.lower().replace(' ', '-')]
 
                 # Get a sample description
                 description = f"Trends in the '{category}' category, derived from Kaggle data."
-                if 'description' in category_df.columns and not category_df['description'].isnull().all():
-                    description = category_df['description'].dropna().iloc[0][:150] + "..." # Take first 150 chars
-                elif 'title' in category_df.columns and not category_df['title'].isnull().all():
-                    description = category_df['title'].dropna().iloc[0][:150] + "..."
-
-                # Use a sample image URL if available, otherwise a placeholder
-                image_url = f"https://placehold.co/300x200/F0F0F0/333333?text={category.replace(' ', '+')}"
-                if 'image_url' in category_df.columns and not category_df['image_url'].isnull().all():
-                    # Take the first non-null image URL for the category
-                    first_image_url = category_df['image_url'].dropna().iloc[0]
-                    # Basic validation to ensure it looks like a URL
-                    if first_image_url.startswith('http'):
-                        image_url = first_image_url
-
-
-                trends_data.append({
-                    "id": i + 1,
-                    "trendName": category,
-                    "category": category,
-                    "currentPopularity": current_popularity,
-                    "predictedPopularityChange": predicted_change_str,
-                    "keywords": keywords,
-                    "imageUrl": image_url,
-                    "description": description
-                })
+                if pd.notna(sample_desc):
+                    description = sample_desc[:150] + "..." # Take first 150 chars
+                elif pd.notna(sample_title):
+                    description = sample_title[:150] + "..."
+
+                trends_data.append(Trend(
+                    id=i + 1,
+                    trendName=category,
+                    category=category,
+                    currentPopularity=int(popularities[i]),
+                    predictedPopularityChange=str(change_strs[i]),
+                    keywords=keywords,
+                    imageUrl=image_urls.loc[category],
+                    description=description
+                ))
         else:
             print("Warning: No suitable category column found or column is empty. Cannot derive trends by category.")
             print("Using mock data as a fallback.")
             # Fallback to mock data if no category column is found or it's empty
             return [
-                {
-                    "id": 1, "trendName": "Fallback: Data Issue", "category": "Unknown",
-                    "currentPopularity": 50, "predictedPopularityChange": "+0",
-                    "keywords": ["data", "error", "check-console"],
-                    "imageUrl": "https://placehold.co/300x200/CCCCCC/666666?text=Data+Error",
-                    "description": "Could not process Kaggle data. Check backend console for column issues."
-                }
+                Trend(
+                    id=1, trendName="Fallback: Data Issue", category="Unknown",
+                    currentPopularity=50, predictedPopularityChange="+0",
+                    keywords=["data", "error", "check-console"],
+                    imageUrl="https://placehold.co/300x200/CCCCCC/666666?text=Data+Error",
+                    description="Could not process Kaggle data. Check backend console for column issues."
+                )
             ]
 
     except Exception as e:
@@ -140,26 +337,104 @@ def load_and_process_data():
         print("Falling back to mock data.")
         # Fallback to mock data on any processing error
         return [
-            {
-                "id": 1, "trendName": "Fallback: Processing Error", "category": "Error",
-                "currentPopularity": 50, "predictedPopularityChange": "+0",
-                "keywords": ["error", "processing", "check-console"],
-                "imageUrl": "https://placehold.co/300x200/CCCCCC/666666?text=Processing+Error",
-                "description": "An error occurred during data processing. See backend console."
-            }
+            Trend(
+                id=1, trendName="Fallback: Processing Error", category="Error",
+                currentPopularity=50, predictedPopularityChange="+0",
+                keywords=["error", "processing", "check-console"],
+                imageUrl="https://placehold.co/300x200/CCCCCC/666666?text=Processing+Error",
+                description="An error occurred during data processing. See backend console."
+            )
         ]
 
     return trends_data if trends_data else [] # Return empty list if no trends were generated
 
-# Load data when the app starts
-processed_fashion_data = load_and_process_data()
+def dataset_cache_key():
+    """
+    Builds a cache key that changes whenever the dataset file or CACHE_VERSION
+    changes, based on its path, mtime, size and a hash of its first 64KB.
+    """
+    stat = os.stat(DATASET_FILE)
+    with open(DATASET_FILE, 'rb') as f:
+        head_digest = hashlib.sha1(f.read(64 * 1024)).hexdigest()
+    return hashlib.sha1(
+        f"{CACHE_VERSION}:{DATASET_FILE}:{stat.st_mtime_ns}:{stat.st_size}:{head_digest}".encode()
+    ).hexdigest()
+
+def cached_load():
+    """
+    Returns the processed trends, reusing a pickled copy from CACHE_DIR when
+    the dataset has not changed since it was written.
+    Fallback data is never cached so a fixed dataset is picked up on restart.
+    """
+    if not os.path.exists(DATASET_FILE):
+        return load_and_process_data()
+
+    cache_file = os.path.join(CACHE_DIR, f"{dataset_cache_key()}.pkl")
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'rb') as f:
+                trends_data = [Trend(**trend) for trend in pickle.load(f)]
+            print(f"Loaded processed trends from cache '{cache_file}'.")
+            return trends_data
+        except Exception as e:
+            print(f"Error reading cache '{cache_file}': {e}. Reprocessing dataset.")
+
+    trends_data = load_and_process_data()
+    if trends_data and not any(trend.trendName.startswith("Fallback:") for trend in trends_data):
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # Write to a temp file and rename it into place, so other processes
+            # never see a partially written cache file
+            fd, tmp_file = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    # Store plain dicts: a pickled Trend would record its module path,
+                    # which is '__main__' under `python app.py` but 'app' under gunicorn
+                    pickle.dump([asdict(trend) for trend in trends_data], f, protocol=5)
+                os.replace(tmp_file, cache_file)
+            except BaseException:
+                os.remove(tmp_file)
+                raise
+            # Remove cache files left by older dataset versions or CACHE_VERSIONs
+            for old_file in glob.glob(os.path.join(CACHE_DIR, '*.pkl')):
+                if os.path.abspath(old_file) != os.path.abspath(cache_file):
+                    try:
+                        os.remove(old_file)
+                    except FileNotFoundError:
+                        pass # Already removed by another process
+        except OSError as e:
+            print(f"Warning: Could not write cache '{cache_file}': {e}")
+    return trends_data
+
+processed_fashion_data = []
+trends_json = b'[]'
+
+def init_data():
+    """
+    Loads the trends (from the cache if the dataset is unchanged) and
+    serializes them once, since they never change while the app is running.
+    """
+    global processed_fashion_data, trends_json
+    processed_fashion_data = cached_load()
+    # Serialize plain dicts so keys are sorted with either JSON provider
+    # (orjson's OPT_SORT_KEYS does not apply to dataclass fields). Going through
+    # response() gives the same compact body jsonify would produce.
+    trends_json = app.json.response([asdict(trend) for trend in processed_fashion_data]).get_data()
+
+# Load data when the app starts. With the debug reloader, `python app.py` runs this
+# module twice: once in the file-watching parent, which never serves requests,
+# and once in the serving child (WERKZEUG_RUN_MAIN='true'). Only load in the latter.
+if __name__ != '__main__' or not DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    init_data()
 
 @app.route('/api/trends', methods=['GET'])
 def get_trends():
     """
     API endpoint to return fashion trend data.
     """
-    return jsonify(processed_fashion_data)
+    response = Response(trends_json, mimetype=app.json.mimetype)
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response
 
 @app.route('/api/predict', methods=['POST'])
 def predict_trend():
@@ -174,4 +449,4 @@ def predict_trend():
 
 if __name__ == '__main__':
     # You can change the port if needed, e.g., port=5001
-    app.run(debug=True, port=5000)
+    app.run(debug=DEBUG, port=5000)
@@ -0,0 +1,10 @@
+"""
+WSGI entry point for running the backend with a production server, e.g.:
+
+    gunicorn --preload -w 4 wsgi:app
+
+With --preload the dataset is loaded once in the master process before the
+workers are forked, so all workers share the processed trends and their
+serialized JSON instead of each loading the CSV again.
+"""
+from app import app